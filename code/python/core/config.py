@@ -13,11 +13,17 @@ import yaml
 import xml.etree.ElementTree as ET
 from dataclasses import dataclass, field
 from dotenv import load_dotenv
+from pathlib import Path, PurePath
 from typing import Dict, Optional, Any, List
 from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("config")
 
+# Use the libyaml C loader when available: it parses the config files several
+# times faster than the pure-Python SafeLoader while keeping identical
+# scalar resolution (ports, TTLs and enabled flags stay typed).
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 @dataclass
 class SiteConfig:
     item_types: List[str]
@@ -58,44 +64,6 @@ class RetrievalProviderConfig:
     vector_type: Optional[str] = None
 
 
-@dataclass
-class ConversationStorageConfig:
-    type: str = "qdrant"
-    enabled: bool = True
-    # Common fields
-    api_key: Optional[str] = None
-    url: Optional[str] = None
-    endpoint: Optional[str] = None
-    database_path: Optional[str] = None
-    collection_name: Optional[str] = None
-    database_name: Optional[str] = None
-    container_name: Optional[str] = None
-    table_name: Optional[str] = None
-    # Connection details
-    host: Optional[str] = None
-    port: Optional[int] = None
-    user: Optional[str] = None
-    password: Optional[str] = None
-    connection_string: Optional[str] = None
-    # Other settings
-    vector_size: int = 1536
-    vector_dimensions: int = 1536
-    partition_key: Optional[str] = None
-    max_conversations: Optional[int] = None
-    ttl_seconds: Optional[int] = None
-
-@dataclass 
-class StorageBehaviorConfig:
-    store_anonymous: bool = True
-    max_conversations_per_thread: int = 100
-    max_threads_per_user: int = 1000
-    retention_days: int = 365
-    compute_embeddings: bool = True
-    batch_size: int = 100
-    enable_search: bool = True
-    auto_migrate_on_login: bool = True
-    max_migrate_conversations: int = 500  
-
 @dataclass
 class SSLConfig:
     enabled: bool = False
@@ -195,62 +163,62 @@ class AppConfig:
         self.load_conversation_storage_config()
         self.load_oauth_config()
 
-    def _get_config_directory(self) -> str:
+    def _get_config_directory(self) -> Path:
         """
         Get the configuration directory from environment variable or use default.
         Default is NLWeb/config relative to the code directory.
+        Returned as a Path so loaders can join onto it without re-parsing strings.
         """
         # Check for environment variable first
         config_dir = os.getenv('NLWEB_CONFIG_DIR')
         if config_dir:
             # Expand any environment variables or ~ in the path
-            config_dir = os.path.expanduser(os.path.expandvars(config_dir))
-            if not os.path.exists(config_dir):
+            config_dir = Path(os.path.expandvars(config_dir)).expanduser()
+            if not config_dir.exists():
                 print(f"Warning: Configured config directory {config_dir} does not exist. Using default.")
                 config_dir = None
-        
+
         if not config_dir:
             # Default: go up three levels from core directory to NLWeb, then to config
             # core -> python -> code -> NLWeb
-            current_dir = os.path.dirname(os.path.abspath(__file__))  # core directory
-            python_dir = os.path.dirname(current_dir)  # python directory
-            code_dir = os.path.dirname(python_dir)  # code directory
-            nlweb_dir = os.path.dirname(code_dir)  # NLWeb directory
-            config_dir = os.path.join(nlweb_dir, 'config')
-        
-        return os.path.abspath(config_dir)
+            config_dir = Path(__file__).resolve().parent.parent.parent.parent / 'config'
+
+        return config_dir.resolve()
 
-    def _get_base_output_directory(self) -> Optional[str]:
+    def _get_base_output_directory(self) -> Optional[Path]:
         """
         Get the base directory for all output files from the environment variable.
         Returns None if the environment variable is not set.
         """
         base_dir = os.getenv('NLWEB_OUTPUT_DIR')
-        if base_dir and not os.path.exists(base_dir):
-            try:
-                os.makedirs(base_dir, exist_ok=True)
-                print(f"Created output directory: {base_dir}")
-            except Exception as e:
-                print(f"Warning: Failed to create output directory {base_dir}: {e}")
-                return None
+        if base_dir:
+            base_dir = Path(base_dir)
+            if not base_dir.exists():
+                try:
+                    base_dir.mkdir(parents=True, exist_ok=True)
+                    print(f"Created output directory: {base_dir}")
+                except Exception as e:
+                    print(f"Warning: Failed to create output directory {base_dir}: {e}")
+                    return None
         return base_dir
 
-    def _resolve_path(self, path: str) -> str:
+    def _resolve_path(self, path: str) -> Path:
         """
         Resolves a path, considering the base output directory if set.
         If path is absolute, returns it unchanged.
         If path is relative and base_output_directory is set, resolves against base_output_directory.
         Otherwise, resolves against the config directory.
         """
-        if os.path.isabs(path):
-            return path
-        
+        path = PurePath(path)
+        if path.is_absolute():
+            return Path(path)
+
         if self.base_output_directory:
             # If base output directory is set, use it for all relative paths
-            return os.path.abspath(os.path.join(self.base_output_directory, path))
+            return (self.base_output_directory / path).resolve()
         else:
             # Otherwise use the config directory
-            return os.path.abspath(os.path.join(self.config_directory, path))
+            return (self.config_directory / path).resolve()
 
     def _get_config_value(self, value: Any, default: Any = None) -> Any:
         """
@@ -274,43 +242,39 @@ class AppConfig:
 
     def load_llm_config(self, path: str = "config_llm.yaml"):
         # Build the full path to the config file using the config directory
-        full_path = os.path.join(self.config_directory, path)
+        full_path = self.config_directory / path
         
         with open(full_path, "r") as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=_YAML_LOADER)
 
             self.preferred_llm_endpoint: str = data["preferred_endpoint"]
-            self.llm_endpoints: Dict[str, LLMProviderConfig] = {}
-
-            for name, cfg in data.get("endpoints", {}).items():
-                m = cfg.get("models", {})
-                models = ModelConfig(
-                    high=self._get_config_value(m.get("high")),
-                    low=self._get_config_value(m.get("low"))
-                ) if m else None
-                
-                # Extract configuration values from the YAML with the new method
-                api_key = self._get_config_value(cfg.get("api_key_env"))
-                api_endpoint = self._get_config_value(cfg.get("api_endpoint_env"))
-                api_version = self._get_config_value(cfg.get("api_version_env"))
-                llm_type = self._get_config_value(cfg.get("llm_type"))
-                # Create the LLM provider config - no longer include embedding model
-                self.llm_endpoints[name] = LLMProviderConfig(
-                    llm_type=llm_type,
-                    api_key=api_key,
-                    models=models,
-                    endpoint=api_endpoint,
-                    api_version=api_version
+
+            # Bind the value resolver as a local to avoid per-endpoint attribute lookups
+            gv = self._get_config_value
+
+            def _models(m):
+                return ModelConfig(high=gv(m.get("high")), low=gv(m.get("low"))) if m else None
+
+            # Create the LLM provider configs - no longer include embedding model
+            self.llm_endpoints: Dict[str, LLMProviderConfig] = {
+                name: LLMProviderConfig(
+                    llm_type=gv(cfg.get("llm_type")),
+                    api_key=gv(cfg.get("api_key_env")),
+                    models=_models(cfg.get("models", {})),
+                    endpoint=gv(cfg.get("api_endpoint_env")),
+                    api_version=gv(cfg.get("api_version_env"))
                 )
+                for name, cfg in data.get("endpoints", {}).items()
+            }
 
     def load_embedding_config(self, path: str = "config_embedding.yaml"):
         """Load embedding model configuration."""
         # Build the full path to the config file using the config directory
-        full_path = os.path.join(self.config_directory, path)
+        full_path = self.config_directory / path
         
         try:
             with open(full_path, "r") as f:
-                data = yaml.safe_load(f)
+                data = yaml.load(f, Loader=_YAML_LOADER)
         except FileNotFoundError:
             # If config file doesn't exist, use defaults
             print(f"Warning: {path} not found. Using default embedding configuration.")
@@ -320,32 +284,29 @@ class AppConfig:
             }
         
         self.preferred_embedding_provider: str = data["preferred_provider"]
-        self.embedding_providers: Dict[str, EmbeddingProviderConfig] = {}
-
-        for name, cfg in data.get("providers", {}).items():
-            # Extract configuration values from the YAML
-            api_key = self._get_config_value(cfg.get("api_key_env"))
-            api_endpoint = self._get_config_value(cfg.get("api_endpoint_env"))
-            api_version = self._get_config_value(cfg.get("api_version_env"))
-            model = self._get_config_value(cfg.get("model"))
-            config = self._get_config_value(cfg.get("config"))
-
-            # Create the embedding provider config
-            self.embedding_providers[name] = EmbeddingProviderConfig(
-                api_key=api_key,
-                endpoint=api_endpoint,
-                api_version=api_version,
-                model=model,
-                config=config
+
+        # Bind the value resolver as a local to avoid per-provider attribute lookups
+        gv = self._get_config_value
+
+        # Create the embedding provider configs
+        self.embedding_providers: Dict[str, EmbeddingProviderConfig] = {
+            name: EmbeddingProviderConfig(
+                api_key=gv(cfg.get("api_key_env")),
+                endpoint=gv(cfg.get("api_endpoint_env")),
+                api_version=gv(cfg.get("api_version_env")),
+                model=gv(cfg.get("model")),
+                config=gv(cfg.get("config"))
             )
+            for name, cfg in data.get("providers", {}).items()
+        }
 
     def load_retrieval_config(self, path: str = "config_retrieval.yaml"):
         # Build the full path to the config file using the config directory
-        full_path = os.path.join(self.config_directory, path)
+        full_path = self.config_directory / path
         
         try:
             with open(full_path, "r") as f:
-                data = yaml.safe_load(f)
+                data = yaml.load(f, Loader=_YAML_LOADER)
         except FileNotFoundError:
             # If config file doesn't exist, use defaults
             print(f"Warning: {path} not found. Using default retrieval configuration.")
@@ -354,35 +315,37 @@ class AppConfig:
                 "endpoints": {}
             }
 
-        # No longer using preferred_endpoint - now using enabled field on each endpoint
-        self.retrieval_endpoints: Dict[str, RetrievalProviderConfig] = {}
-        
         # Get the write endpoint for database modifications
         self.write_endpoint: str = data.get("write_endpoint", None)
 
-        # Changed from providers to endpoints
-        for name, cfg in data.get("endpoints", {}).items():
-            # Use the new method for all configuration values
-            self.retrieval_endpoints[name] = RetrievalProviderConfig(
-                api_key=self._get_config_value(cfg.get("api_key_env")),
+        # Bind the value resolver as a local to avoid per-endpoint attribute lookups
+        gv = self._get_config_value
+
+        # No longer using preferred_endpoint - now using enabled field on each endpoint.
+        # Changed from providers to endpoints.
+        self.retrieval_endpoints: Dict[str, RetrievalProviderConfig] = {
+            name: RetrievalProviderConfig(
+                api_key=gv(cfg.get("api_key_env")),
                 api_key_env=cfg.get("api_key_env"),  # Store the env var name
-                api_endpoint=self._get_config_value(cfg.get("api_endpoint_env")),
+                api_endpoint=gv(cfg.get("api_endpoint_env")),
                 api_endpoint_env=cfg.get("api_endpoint_env"),  # Store the env var name
-                database_path=self._get_config_value(cfg.get("database_path")),
-                index_name=self._get_config_value(cfg.get("index_name")),
-                db_type=self._get_config_value(cfg.get("db_type")),  # Add db_type
+                database_path=gv(cfg.get("database_path")),
+                index_name=gv(cfg.get("index_name")),
+                db_type=gv(cfg.get("db_type")),  # Add db_type
                 enabled=cfg.get("enabled", False),  # Add enabled field
                 use_knn=cfg.get("use_knn"),
                 vector_type=cfg.get("vector_type")
             )
+            for name, cfg in data.get("endpoints", {}).items()
+        }
     
     def load_webserver_config(self, path: str = "config_webserver.yaml"):
         # Build the full path to the config file using the config directory
-        full_path = os.path.join(self.config_directory, path)
+        full_path = self.config_directory / path
         
         try:
             with open(full_path, "r") as f:
-                data = yaml.safe_load(f)
+                data = yaml.load(f, Loader=_YAML_LOADER)
         except FileNotFoundError:
             # If config file doesn't exist, use defaults
             print(f"Warning: {path} not found. Using default webserver configuration.")
@@ -398,8 +361,8 @@ class AppConfig:
         self.mode: str = self._get_config_value(data.get("mode"), "production")
         
         # Keep static directory relative to config directory, not base output directory
-        if not os.path.isabs(self.static_directory):
-            self.static_directory = os.path.abspath(os.path.join(self.config_directory, self.static_directory))
+        if not PurePath(self.static_directory).is_absolute():
+            self.static_directory = str((self.config_directory / self.static_directory).resolve())
         
         # Load server configurations
         server_data = data.get("server", {})
@@ -416,7 +379,7 @@ class AppConfig:
         logging_data = server_data.get("logging", {})
         logging_file = self._get_config_value(logging_data.get("file"), "./logs/webserver.log")
         # Use the _resolve_path method for logging file (but not for static directory)
-        logging_file = self._resolve_path(logging_file)
+        logging_file = str(self._resolve_path(logging_file))
         
         logging_config = LoggingConfig(
             level=self._get_config_value(logging_data.get("level"), "info"),
@@ -445,11 +408,11 @@ class AppConfig:
     def load_nlweb_config(self, path: str = "config_nlweb.yaml"):
         """Load Natural Language Web configuration."""
         # Build the full path to the config file using the config directory
-        full_path = os.path.join(self.config_directory, path)
+        full_path = self.config_directory / path
         
         try:
             with open(full_path, "r") as f:
-                data = yaml.safe_load(f)
+                data = yaml.load(f, Loader=_YAML_LOADER)
         except FileNotFoundError:
             # If config file doesn't exist, use defaults
             print(f"Warning: {path} not found. Using default NLWeb configuration.")
@@ -502,10 +465,7 @@ class AppConfig:
         
         # Load required info enabled flag
         required_info_enabled = self._get_config_value(data.get("required_info_enabled"), True)
-        
-        # Load headers from config
-        headers = data.get("headers", {})
-        
+
         # Load API keys from config
         api_keys = {}
         if "api_keys" in data:
@@ -517,10 +477,10 @@ class AppConfig:
         # Convert relative paths to use NLWEB_OUTPUT_DIR if available
         base_output_dir = self.base_output_directory
         if base_output_dir:
-            if not os.path.isabs(json_data_folder):
-                json_data_folder = os.path.join(base_output_dir, "data", "json")
-            if not os.path.isabs(json_with_embeddings_folder):
-                json_with_embeddings_folder = os.path.join(base_output_dir, "data", "json_with_embeddings")
+            if not PurePath(json_data_folder).is_absolute():
+                json_data_folder = str(base_output_dir / "data" / "json")
+            if not PurePath(json_with_embeddings_folder).is_absolute():
+                json_with_embeddings_folder = str(base_output_dir / "data" / "json_with_embeddings")
     
         # Ensure directories exist
         os.makedirs(json_data_folder, exist_ok=True)
@@ -649,7 +609,7 @@ class AppConfig:
     def load_sites_config(self, path: str = "sites.xml"):
         """Load site configurations from XML file."""
         # Build the full path to the config file using the config directory
-        full_path = os.path.join(self.config_directory, path)
+        full_path = self.config_directory / path
         
         try:
             # Parse the XML file
@@ -728,11 +688,11 @@ class AppConfig:
     def load_oauth_config(self, path: str = "config_oauth.yaml"):
         """Load OAuth provider configuration."""
         # Build the full path to the config file using the config directory
-        full_path = os.path.join(self.config_directory, path)
+        full_path = self.config_directory / path
         
         try:
             with open(full_path, "r") as f:
-                data = yaml.safe_load(f)
+                data = yaml.load(f, Loader=_YAML_LOADER)
         except FileNotFoundError:
             # If config file doesn't exist, use defaults
             logger.warning(f"{path} not found. OAuth authentication will not be available.")
@@ -784,11 +744,11 @@ class AppConfig:
     def load_conversation_storage_config(self, path: str = "config_conv_store.yaml"):
         """Load conversation storage configuration."""
         # Build the full path to the config file using the config directory
-        full_path = os.path.join(self.config_directory, path)
+        full_path = self.config_directory / path
         
         try:
             with open(full_path, "r") as f:
-                data = yaml.safe_load(f)
+                data = yaml.load(f, Loader=_YAML_LOADER)
                 
             # Load default storage endpoint
             self.conversation_storage_default = data.get("default_storage", "qdrant_local")
@@ -809,7 +769,7 @@ class AppConfig:
                     api_key=self._get_config_value(cfg.get("api_key_env")),
                     url=self._get_config_value(cfg.get("url_env")),
                     endpoint=self._get_config_value(cfg.get("endpoint_env")),
-                    database_path=self._resolve_path(cfg.get("database_path")) if cfg.get("database_path") else None,
+                    database_path=str(self._resolve_path(cfg.get("database_path"))) if cfg.get("database_path") else None,
                     # Names
                     collection_name=cfg.get("collection_name"),
                     database_name=cfg.get("database_name"),
@@ -859,7 +819,7 @@ class AppConfig:
                     self.conversation_storage = ConversationStorageConfig(
                         type="qdrant",
                         enabled=True,
-                        database_path=self._resolve_path("../data/conversations_db"),
+                        database_path=str(self._resolve_path("../data/conversations_db")),
                         collection_name="nlweb_conversations"
                     )
                     
@@ -869,7 +829,7 @@ class AppConfig:
             self.conversation_storage = ConversationStorageConfig(
                 type="qdrant",
                 enabled=True,
-                database_path=self._resolve_path("../data/conversations_db"),
+                database_path=str(self._resolve_path("../data/conversations_db")),
                 collection_name="nlweb_conversations"
             )
             self.conversation_storage_behavior = StorageBehaviorConfig()
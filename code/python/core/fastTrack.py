@@ -11,21 +11,184 @@ WARNING: This code is under development and may undergo changes in future releas
 Backwards compatibility is not guaranteed at this time.
 """
 
+from core.config import CONFIG
 from core.retriever import search
 import core.ranking as ranking
 from misc.logger.logging_config_helper import get_configured_logger
+from dataclasses import dataclass
 import asyncio
+import collections
+import heapq
+import time
 
 logger = get_configured_logger("fast_track")
 
+# How long a cached retrieval stays usable
+CACHE_TTL_SECONDS = 300
+
+# Empty results are cached too (so repeat queries that legitimately find
+# nothing don't hammer the vector DB), but with a much shorter TTL in
+# case the index is still being populated.
+EMPTY_RESULT_TTL_SECONDS = CACHE_TTL_SECONDS / 10
+
+# Hard bound on the number of cached retrievals
+CACHE_MAX_ENTRIES = 512
+
+
+@dataclass(slots=True)
+class PerformanceMetrics:
+    """Per-request fast-track counters. slots=True keeps the instance to
+    a fixed-size struct instead of a per-instance __dict__, which matters
+    because one is allocated for every fast-track request."""
+    start_time: float = 0.0
+    end_time: float = 0.0
+    items_retrieved: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def start_timer(self):
+        self.start_time = time.monotonic()
+
+    def stop_timer(self):
+        self.end_time = time.monotonic()
+
+    def get_duration(self):
+        return self.end_time - self.start_time
+
+
+def get_query_cache_key(query, site, endpoint=None):
+    """Build the cache key for a (query, site, endpoint) triple."""
+    # A plain tuple hashes in C with no allocation and no digest step;
+    # the key never leaves this process, so a cryptographic hash adds
+    # nothing but cost. Multi-site requests carry site as a list
+    # (baseHandler splits "a,b"), which doesn't hash - use a tuple.
+    if isinstance(site, list):
+        site = tuple(site)
+    return (query, site, endpoint)
+
 
 class FastTrack:
+
+    # Retrieval cache shared across all FastTrack instances, mapping
+    # cache key -> (cached_at, items). Lookups and inserts are plain
+    # single-key dict operations, which are atomic under the GIL, so no
+    # lock is needed and cache access never yields to the event loop.
+    # The OrderedDict keeps LRU order (oldest first) so the cache can be
+    # bounded; _expiry_heap holds (expiry, key) pairs so stale entries
+    # are purged opportunistically on insert instead of only on lookup.
+    _cache = collections.OrderedDict()
+    _expiry_heap = []
+
+    # In-flight retrievals keyed like _cache, so concurrent requests for
+    # the same (query, site) share one backend search (single-flight).
+    _inflight = {}
+
     def __init__(self, handler):
         self.handler = handler
+        self._eligible = None  # memoized is_fastTrack_eligible result
+        self.metrics = PerformanceMetrics()
         logger.debug("FastTrack initialized")
 
+    def _effective_endpoint(self):
+        """Resolve the retrieval endpoint the way VectorDBClient will,
+        so cached results are scoped to the backend that produced them
+        (development mode can override it per request)."""
+        query_params = self.handler.query_params
+        if CONFIG.is_development_mode() and query_params:
+            endpoint = query_params.get('db') or query_params.get('retrieval_backend')
+            if isinstance(endpoint, list):
+                endpoint = endpoint[0] if endpoint else None
+            if endpoint:
+                return endpoint
+        return None
+
+    def _get_cached_results(self, query, site):
+        """Return cached retrieval results for (query, site), or None."""
+        cache_key = get_query_cache_key(query, site, self._effective_endpoint())
+        entry = self._cache.get(cache_key)
+        if entry is None:
+            return None
+        cached_at, items, ttl = entry
+        if time.monotonic() - cached_at > ttl:
+            # pop() is atomic, so concurrent expiry attempts are safe
+            self._cache.pop(cache_key, None)
+            logger.debug("Cache entry expired for query: %s", query)
+            return None
+        logger.debug("Cache hit for query: %s", query)
+        self._cache.move_to_end(cache_key)  # LRU: refresh on read
+        return items
+
+    def _cache_results(self, query, site, items, ttl=CACHE_TTL_SECONDS):
+        """Store retrieval results for (query, site)."""
+        cache_key = get_query_cache_key(query, site, self._effective_endpoint())
+        now = time.monotonic()
+        self._cache[cache_key] = (now, items, ttl)
+        self._cache.move_to_end(cache_key)
+        heapq.heappush(self._expiry_heap, (now + ttl, cache_key))
+        self._purge_expired(now)
+        while len(self._cache) > CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)  # evict least recently used
+
+    @classmethod
+    def _purge_expired(cls, now):
+        """Drop cache entries whose TTL has passed, in O(log n) per entry."""
+        while cls._expiry_heap and cls._expiry_heap[0][0] <= now:
+            _, cache_key = heapq.heappop(cls._expiry_heap)
+            entry = cls._cache.get(cache_key)
+            # The key may have been refreshed since this heap entry was
+            # pushed; only drop it if the live entry really is stale.
+            if entry is not None and now - entry[0] > entry[2]:
+                cls._cache.pop(cache_key, None)
+
+    async def _retrieve_items(self):
+        """Retrieve items for the current query, consulting the cache first."""
+        handler = self.handler
+        query = handler.query
+        site = handler.site
+        cached = self._get_cached_results(query, site)
+        if cached is not None:
+            self.metrics.cache_hits += 1
+            return cached
+        self.metrics.cache_misses += 1
+
+        cache_key = get_query_cache_key(query, site, self._effective_endpoint())
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            logger.debug("Coalescing with in-flight retrieval for query: %s", query)
+            return await inflight
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[cache_key] = future
+        logger.debug("Cache miss, retrieving items for query: %s", query)
+        try:
+            items = await search(
+                query,
+                site,
+                query_params=handler.query_params,
+                handler=handler
+            )
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved for callers that never await
+            raise
+        else:
+            ttl = CACHE_TTL_SECONDS if items else EMPTY_RESULT_TTL_SECONDS
+            self._cache_results(query, site, items, ttl)
+            future.set_result(items)
+            return items
+        finally:
+            self._inflight.pop(cache_key, None)
+
     def is_fastTrack_eligible(self):
         """Check if query is eligible for fast track processing"""
+        # Eligibility depends only on request fields that don't change,
+        # so compute it once and reuse if do() is re-entered.
+        if self._eligible is None:
+            self._eligible = self._check_eligibility()
+        return self._eligible
+
+    def _check_eligibility(self):
         # Skip fast track for sites without embeddings
         if "datacommons" in self.handler.site:
             logger.debug("Fast track not eligible: DataCommons site has no embeddings")
@@ -34,7 +197,7 @@ class FastTrack:
             logger.debug("Fast track not eligible: context_url present")
             return False
         if (len(self.handler.prev_queries) > 0):
-            logger.debug(f"Fast track not eligible: {len(self.handler.prev_queries)} previous queries present")
+            logger.debug("Fast track not eligible: %d previous queries present", len(self.handler.prev_queries))
             return False
         logger.info("Query is eligible for fast track")
         return True
@@ -46,30 +209,30 @@ class FastTrack:
             return
         
         logger.info("Starting fast track processing")
+        self.metrics.start_timer()
         
         self.handler.retrieval_done_event.set()  # Use event instead of flag
         
         try:
-            logger.debug(f"Retrieving items for query: {self.handler.query}")
-            items = await search(
-                self.handler.query, 
-                self.handler.site,
-                query_params=self.handler.query_params,
-                handler=self.handler
-            )
+            logger.debug("Retrieving items for query: %s", self.handler.query)
+            items = await self._retrieve_items()
             self.handler.final_retrieved_items = items
-            logger.info(f"Fast track retrieved {len(items)} items")
+            self.metrics.items_retrieved = len(items)
+            logger.info("Fast track retrieved %d items", len(items))
             
-            # Wait for decontextualization to complete with timeout
-            decon_done = False
-            try:
-                decon_done = await asyncio.wait_for(
-                    self.handler.state.wait_for_decontextualization(),
-                    timeout=5.0  # 5 second timeout
-                )
-            except asyncio.TimeoutError:
-                logger.warning("Decontextualization timed out in fast track")
-                return
+            # Wait for decontextualization to complete with timeout.
+            # Peek at the done flag first: when decontextualization has
+            # already finished (the common case by the time retrieval
+            # returns), no timer or wrapper task is allocated at all.
+            decon_done = self.handler.state.is_decontextualization_done()
+            if not decon_done:
+                try:
+                    decon_done = await asyncio.wait_for(
+                        self.handler.state.wait_for_decontextualization(),
+                        timeout=5.0)  # 5 second timeout
+                except asyncio.TimeoutError:
+                    logger.warning("Decontextualization timed out in fast track")
+                    return
             
             if decon_done:
                 logger.debug("Decontextualization is done")
@@ -92,8 +255,13 @@ class FastTrack:
                 return
                 
         except Exception as e:
-            logger.error(f"Error during fast track processing: {str(e)}")
+            logger.error("Error during fast track processing: %s", str(e))
             logger.debug("Fast track error details:", exc_info=True)
             raise
+        finally:
+            self.metrics.stop_timer()
+            logger.debug("Fast track took %.3fs (items=%d, cache hits=%d, misses=%d)",
+                         self.metrics.get_duration(), self.metrics.items_retrieved,
+                         self.metrics.cache_hits, self.metrics.cache_misses)
         
         logger.info("Fast track processing completed")
\ No newline at end of file
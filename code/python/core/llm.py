@@ -267,6 +267,50 @@ async def ask_llm(
         return {}
 
 
+async def ask_llm_batch(
+    prompts: list,
+    schema: Dict[str, Any],
+    provider: Optional[str] = None,
+    level: str = "low",
+    timeout: int = 8,
+    query_params: Optional[Dict[str, Any]] = None,
+    max_length: int = 512,
+    max_batch: int = 16
+) -> list:
+    """
+    Dispatch a batch of prompts sharing one schema and return the parsed
+    responses aligned with the input order.
+
+    None of the configured providers expose a native multi-prompt
+    completion API, so each prompt still costs one request; they are
+    issued concurrently in windows of max_batch so a large batch cannot
+    flood the provider. If a provider grows a native batch endpoint,
+    this is the seam to route it through.
+
+    Args:
+        prompts: List of text prompts to send to the LLM
+        schema: JSON schema that each response should conform to
+        provider: The LLM endpoint to use (if None, use preferred endpoint from config)
+        level: The model tier to use ('low' or 'high')
+        timeout: Per-request timeout in seconds
+        query_params: Optional query parameters for development mode provider override
+        max_length: Maximum length of each response in tokens (default: 512)
+        max_batch: Maximum number of requests in flight at once (default: 16)
+
+    Returns:
+        List of parsed JSON responses, one per prompt ({} for failures)
+    """
+    results = []
+    for start in range(0, len(prompts), max_batch):
+        window = prompts[start:start + max_batch]
+        results.extend(await asyncio.gather(*(
+            ask_llm(prompt, schema, provider=provider, level=level, timeout=timeout,
+                    query_params=query_params, max_length=max_length)
+            for prompt in window
+        )))
+    return results
+
+
 def get_available_providers() -> list:
     """
     Get a list of LLM providers that have their required API keys available.
@@ -8,10 +8,19 @@ WARNING: This code is under development and may undergo changes in future releas
 Backwards compatibility is not guaranteed at this time.
 """
 
-from core.utils.utils import log
+from core.utils.utils import get_param, log
+from core.config import CONFIG
 from core.llm import ask_llm
+from dataclasses import dataclass
 import asyncio
+import collections
+import functools
+import hashlib
+import heapq
 import json
+import logging
+import os
+import time
 from core.utils.json_utils import trim_json
 from core.prompts import find_prompt, fill_prompt
 from misc.logger.logging_config_helper import get_configured_logger
@@ -19,15 +28,76 @@ from misc.logger.logging_config_helper import get_configured_logger
 logger = get_configured_logger("ranking_engine")
 
 
+@dataclass(slots=True)
+class RankingMetrics:
+    """Per-ranking-pass counters. slots=True keeps the instance to a
+    fixed-size struct instead of a per-instance __dict__, matching the
+    fast-track metrics object."""
+    start_time: float = 0.0
+    end_time: float = 0.0
+    items_ranked: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def start_timer(self):
+        self.start_time = time.monotonic()
+
+    def stop_timer(self):
+        self.end_time = time.monotonic()
+
+    def get_duration(self):
+        return self.end_time - self.start_time
+
+    @property
+    def hit_ratio(self):
+        total = self.cache_hits + self.cache_misses
+        return self.cache_hits / total if total else 0.0
+
+    def log_summary(self):
+        logger.debug("Ranking took %.3fs (items=%d, cache hits=%d, misses=%d, hit ratio=%.2f)",
+                     self.get_duration(), self.items_ranked,
+                     self.cache_hits, self.cache_misses, self.hit_ratio)
+
+
 class Ranking:
      
     EARLY_SEND_THRESHOLD = 59
     NUM_RESULTS_TO_SEND = 10
 
+    # Cap on concurrently outstanding LLM ranking calls per request,
+    # overridable per deployment via NLWEB_RANK_CONCURRENCY
+    MAX_CONCURRENT_LLM_REQUESTS = int(os.getenv("NLWEB_RANK_CONCURRENCY", 10))
+
+    # How long a cached ranking stays usable
+    CACHE_TTL_SECONDS = 300
+
+    # Hard bound on the number of cached rankings
+    CACHE_MAX_ENTRIES = 10_000
+
+    # Proactively sweep expired entries at most this often (seconds)
+    CACHE_EXPIRE_INTERVAL = 60
+
+    # Ranking responses cached across Ranking instances, mapping
+    # cache key -> (cached_at, ranking dict). Single-key dict operations
+    # are atomic under the GIL, so lookups and inserts take no lock and
+    # never yield to the event loop. The OrderedDict keeps LRU order
+    # (least recently used first) so the cache can be size-bounded.
+    _ranking_cache = collections.OrderedDict()
+    _last_cache_sweep = 0.0
+
+    # In-flight LLM calls keyed like _ranking_cache, so concurrent
+    # misses on the same key share one call (single-flight). Class-level
+    # so duplicates across Ranking instances coalesce too.
+    _inflight = {}
+
     FAST_TRACK = 1
     REGULAR_TRACK = 2
 
     # This is the default ranking prompt, in case, for some reason, we can't find the site_type.xml file.
+    # Keep {item.description} at the very end: it is the only part that
+    # varies between items in a ranking pass, so everything before it is
+    # a byte-identical prefix across the N calls and providers with
+    # automatic prompt caching can reuse the prefill for it.
     RANKING_PROMPT = ["""  Assign a score between 0 and 100 to the following {site.itemType}
 based on how relevant it is to the user's question. Use your knowledge from other sources, about the item, to make a judgement. 
 If the score is above 50, provide a short description of the item highlighting the relevance to the user's question, without mentioning the user's question.
@@ -40,6 +110,11 @@ The user's question is: {request.query}. The item's description is {item.descrip
     RANKING_PROMPT_NAME = "RankingPrompt"
      
     def get_ranking_prompt(self):
+        # site and item_type are fixed for the life of a Ranking instance,
+        # so the prompt is looked up once in __init__ and reused per item.
+        return self._prompt_str, self._ans_struc
+
+    def _lookup_ranking_prompt(self):
         site = self.handler.site
         item_type = self.handler.item_type
         prompt_str, ans_struc = find_prompt(site, item_type, self.RANKING_PROMPT_NAME)
@@ -47,88 +122,224 @@ The user's question is: {request.query}. The item's description is {item.descrip
             logger.debug("Using default ranking prompt")
             return self.RANKING_PROMPT[0], self.RANKING_PROMPT[1]
         else:
-            logger.debug(f"Using custom ranking prompt for site: {site}, item_type: {item_type}")
+            logger.debug("Using custom ranking prompt for site: %s, item_type: %s", site, item_type)
             return prompt_str, ans_struc
         
-    def __init__(self, handler, items, ranking_type=FAST_TRACK):
+    def __init__(self, handler, items, ranking_type=FAST_TRACK, include_description=True):
         ll = len(items)
         self.ranking_type_str = "FAST_TRACK" if ranking_type == self.FAST_TRACK else "REGULAR_TRACK"
-        logger.info(f"Initializing Ranking with {ll} items, type: {self.ranking_type_str}")
-        logger.info(f"Ranking {ll} items of type {self.ranking_type_str}")
+        logger.info("Initializing Ranking with %d items, type: %s", ll, self.ranking_type_str)
+        logger.info("Ranking %d items of type %s", ll, self.ranking_type_str)
         self.handler = handler
         self.items = items
         self.num_results_sent = 0
         self.rankedAnswers = []
         self.ranking_type = ranking_type
         self._results_lock = asyncio.Lock()  # Add lock for thread-safe operations
+        # The loop's clock is the same monotonic clock time.monotonic()
+        # reads, but loop.time() is cached near the loop tick, so cache
+        # touches on the hot path skip the clock syscall.
+        self._loop = asyncio.get_running_loop()
+        # Bounds LLM calls only; cache hits and result handling never wait on it
+        self._llm_sem = asyncio.Semaphore(self.MAX_CONCURRENT_LLM_REQUESTS)
+        self._sent_scores = []  # min-heap of scores already sent
+        self.metrics = RankingMetrics()
+        self._prompt_str, self._ans_struc = self._lookup_ranking_prompt()
+        # Score-only mode: descriptions dominate the output tokens of a
+        # ranking response, so callers that only need scores can drop
+        # them from the answer schema and cap the response length.
+        self.include_description = include_description
+        if not include_description:
+            self._ans_struc = {k: v for k, v in self._ans_struc.items() if k != "description"}
+        self._max_llm_tokens = 512 if include_description else 16
+        # Partially evaluate the prompt template: every placeholder
+        # except {item.description} is fixed for this instance, so
+        # resolve them once and keep the filled pieces around the
+        # per-item slot. rankItem then assembles each prompt with a
+        # single join instead of re-resolving every variable per item.
+        self._prompt_parts = [fill_prompt(part, handler, {})
+                              for part in self._prompt_str.split("{item.description}")]
+        # Everything in the filled prompt except the item description is
+        # fixed for this instance; hash it once here so per-item cache
+        # keys only need to hash the description. The endpoint is folded
+        # in too, since the shared cache must not serve one model's
+        # scores for another's.
+        base_prompt = "".join(self._prompt_parts)
+        # Resolve the provider and model tier the same way ask_llm will,
+        # including the development-mode per-request overrides, so two
+        # requests hitting different effective models never share a key.
+        provider_name = str(CONFIG.preferred_llm_endpoint)
+        level = "low"
+        if CONFIG.is_development_mode() and handler.query_params:
+            provider_name = get_param(handler.query_params, "llm_provider", str, None) or provider_name
+            level = get_param(handler.query_params, "llm_level", str, None) or level
+        h = hashlib.blake2b(digest_size=16)
+        h.update(provider_name.encode())
+        h.update(b"\x00")
+        h.update(level.encode())
+        h.update(b"\x01" if include_description else b"\x02")
+        h.update(base_prompt.encode())
+        self._prompt_salt = int.from_bytes(h.digest(), "little")
 
-    async def rankItem(self, url, json_str, name, site):
-        if not self.handler.connection_alive_event.is_set():
-            logger.warning("Connection lost, skipping item ranking")
+    @staticmethod
+    def _content_fingerprint(json_str):
+        """Fingerprint an item's raw content for duplicate grouping."""
+        s = json_str if isinstance(json_str, str) else str(json_str)
+        return hashlib.blake2b(s.encode(), digest_size=16).digest()
+
+    def _generate_cache_key(self, description):
+        """Hash an item description into a compact int cache key."""
+        # The prompt template and query are folded in via _prompt_salt,
+        # so only the description is digested per item; blake2b is the
+        # fastest digest in the stdlib, and the int key is cheaper to
+        # hash and store than a 32-char hex string.
+        h = hashlib.blake2b(description.encode(), digest_size=16)
+        return self._prompt_salt ^ int.from_bytes(h.digest(), "little")
+
+    def _get_cached_ranking(self, cache_key):
+        """Return the cached ranking for cache_key, or None."""
+        entry = self._ranking_cache.get(cache_key)
+        if entry is None:
+            return None
+        cached_at, result = entry
+        if self._loop.time() - cached_at > self.CACHE_TTL_SECONDS:
+            # pop() is atomic, so concurrent expiry attempts are safe
+            self._ranking_cache.pop(cache_key, None)
+            return None
+        self._ranking_cache.move_to_end(cache_key)  # LRU: refresh on read
+        return result
+
+    def _cache_ranking(self, cache_key, result):
+        """Store a ranking result under cache_key."""
+        self._ranking_cache[cache_key] = (self._loop.time(), result)
+        self._ranking_cache.move_to_end(cache_key)
+        while len(self._ranking_cache) > self.CACHE_MAX_ENTRIES:
+            self._ranking_cache.popitem(last=False)  # evict least recently used
+
+    @classmethod
+    def _expire_cache(cls):
+        """Sweep expired entries, rate-limited so long-idle keys don't
+        linger until their slot happens to be read again."""
+        now = time.monotonic()
+        if now - cls._last_cache_sweep < cls.CACHE_EXPIRE_INTERVAL:
             return
-        if (self.ranking_type == Ranking.FAST_TRACK and self.handler.state.should_abort_fast_track()):
-            logger.info("Fast track aborted, skipping item ranking")
-            logger.info("Aborting fast track")
+        cls._last_cache_sweep = now
+        expired = [k for k, (cached_at, _) in cls._ranking_cache.items()
+                   if now - cached_at > cls.CACHE_TTL_SECONDS]
+        for k in expired:
+            cls._ranking_cache.pop(k, None)
+
+    def _should_continue(self):
+        """One consolidated guard for the checks every stage repeats:
+        the client is still connected and, on the fast track, the abort
+        conditions have not been met."""
+        if not self.handler.connection_alive_event.is_set():
+            return False
+        return not (self.ranking_type == Ranking.FAST_TRACK
+                    and self.handler.state.should_abort_fast_track())
+
+    async def rankItem(self, url, json_str, name, site, duplicates=()):
+        if not self._should_continue():
+            logger.info("Connection lost or fast track aborted, skipping item ranking")
             return
         try:
-            logger.debug(f"Ranking item: {name} from {site}")
-            prompt_str, ans_struc = self.get_ranking_prompt()
-            description = trim_json(json_str)
-            prompt = fill_prompt(prompt_str, self.handler, {"item.description": description})
-            
-            logger.debug(f"Sending ranking request to LLM for item: {name}")
-            ranking = await ask_llm(prompt, ans_struc, level="low", query_params=self.handler.query_params)
-            logger.debug(f"Received ranking score: {ranking.get('score', 'N/A')} for item: {name}")
-            
-            
-            # Handle both string and dictionary inputs for json_str
+            logger.debug("Ranking item: %s from %s", name, site)
+            ans_struc = self._ans_struc
+            # Parse the item JSON once; trim_json accepts the parsed
+            # object directly, so the multi-KB payload isn't decoded a
+            # second time for schema_object below.
             schema_object = json_str if isinstance(json_str, dict) else json.loads(json_str)
-            
+            description = trim_json(schema_object)
+
+            cache_key = self._generate_cache_key(str(description))
+            cached = self._get_cached_ranking(cache_key)
+            if cached is not None:
+                logger.debug("Ranking cache hit for item: %s", name)
+                self.metrics.cache_hits += 1
+                # Copy so per-item adjustments below don't mutate the cache
+                ranking = dict(cached)
+            elif (inflight := self._inflight.get(cache_key)) is not None:
+                logger.debug("Coalescing with in-flight ranking call for item: %s", name)
+                self.metrics.cache_hits += 1
+                # Copy so per-item adjustments don't leak between waiters
+                ranking = dict(await inflight)
+            else:
+                logger.debug("Sending ranking request to LLM for item: %s", name)
+                self.metrics.cache_misses += 1
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[cache_key] = future
+                prompt = str(description).join(self._prompt_parts)
+                try:
+                    async with self._llm_sem:
+                        ranking = await ask_llm(prompt, ans_struc, level="low", query_params=self.handler.query_params,
+                                                max_length=self._max_llm_tokens)
+                except BaseException as e:
+                    # BaseException so cancellation also reaches waiters
+                    # coalesced on this future instead of hanging them
+                    future.set_exception(e)
+                    future.exception()  # mark retrieved for waiters that never await
+                    raise
+                else:
+                    future.set_result(ranking)
+                finally:
+                    self._inflight.pop(cache_key, None)
+                if ranking and "score" in ranking:
+                    self._cache_ranking(cache_key, dict(ranking))
+            logger.debug("Received ranking score: %s for item: %s", ranking.get('score', 'N/A'), name)
+
             # If schema_object is an array, set it to the first item
             if isinstance(schema_object, list) and len(schema_object) > 0:
                 schema_object = schema_object[0]
             
-            ansr = {
-                'url': url,
-                'site': site,
-                'name': name,
-                'ranking': ranking,
-                'schema_object': schema_object,
-                'sent': False,
-            }
-            
-            # Check if required_item_type is specified and filter based on @type
-            if self.handler.required_item_type is not None:
-                item_type = schema_object.get('@type', None)
-                if item_type != self.handler.required_item_type:
-                    logger.debug(f"Item type mismatch: expected {self.handler.required_item_type}, got {item_type} - setting score to 0")
-                    ranking["score"] = 0
-            
-            if (ranking["score"] > self.EARLY_SEND_THRESHOLD):
-                logger.info(f"High score item: {name} (score: {ranking['score']}) - sending early {self.ranking_type_str}")
-                try:
-                    await self.sendAnswers([ansr])
-                except (BrokenPipeError, ConnectionResetError):
-                    logger.warning(f"Client disconnected while sending early answer for {name}")
-                    self.handler.connection_alive_event.clear()
-                    return
-            
-            async with self._results_lock:  # Use lock when modifying shared state
-                self.rankedAnswers.append(ansr)
-            logger.debug(f"Item {name} added to ranked answers")
+            # One LLM call covers the representative item and any
+            # duplicates with identical content
+            await self._record_answer(url, site, name, ranking, schema_object)
+            for dup_url, _, dup_name, dup_site in duplicates:
+                await self._record_answer(dup_url, dup_site, dup_name, dict(ranking), schema_object)
         
         except Exception as e:
-            logger.error(f"Error in rankItem for {name}: {str(e)}")
-            logger.debug(f"Full error trace: ", exc_info=True)
-            # Import here to avoid circular import
-            from config.config import CONFIG
+            logger.error("Error in rankItem for %s: %s", name, e)
+            logger.debug("Full error trace:", exc_info=True)
             if CONFIG.should_raise_exceptions():
                 raise  # Re-raise in testing/development mode
 
+    async def _record_answer(self, url, site, name, ranking, schema_object):
+        """Build the answer entry for one item, early-send it if the score
+        clears the threshold, and add it to rankedAnswers."""
+        ansr = {
+            'url': url,
+            'site': site,
+            'name': name,
+            'ranking': ranking,
+            'schema_object': schema_object,
+            'sent': False,
+        }
+        
+        # Check if required_item_type is specified and filter based on @type
+        if self.handler.required_item_type is not None:
+            item_type = schema_object.get('@type', None)
+            if item_type != self.handler.required_item_type:
+                logger.debug("Item type mismatch: expected %s, got %s - setting score to 0", self.handler.required_item_type, item_type)
+                ranking["score"] = 0
+        
+        if (ranking["score"] > self.EARLY_SEND_THRESHOLD):
+            logger.info("High score item: %s (score: %s) - sending early %s", name, ranking['score'], self.ranking_type_str)
+            try:
+                await self.sendAnswers([ansr])
+            except (BrokenPipeError, ConnectionResetError):
+                logger.warning("Client disconnected while sending early answer for %s", name)
+                self.handler.connection_alive_event.clear()
+                return
+        
+        async with self._results_lock:  # Use lock when modifying shared state
+            self.rankedAnswers.append(ansr)
+        self.metrics.items_ranked += 1
+        logger.debug("Item %s added to ranked answers", name)
+
     def shouldSend(self, result):
         # Don't send if we've already reached the limit
         if self.num_results_sent >= self.NUM_RESULTS_TO_SEND:
-            logger.debug(f"Not sending {result['name']} - already at limit ({self.num_results_sent}/{self.NUM_RESULTS_TO_SEND})")
+            logger.debug("Not sending %s - already at limit (%d/%d)", result['name'], self.num_results_sent, self.NUM_RESULTS_TO_SEND)
             return False
             
         should_send = False
@@ -136,54 +347,51 @@ The user's question is: {request.query}. The item's description is {item.descrip
         if (self.num_results_sent < self.NUM_RESULTS_TO_SEND - 3):
             should_send = True
         else:
-            # Near the limit - only send if this result is better than something we already sent
-            for r in self.rankedAnswers:
-                if r["sent"] == True and r["ranking"]["score"] < result["ranking"]["score"]:
-                    should_send = True
-                    break
+            # Near the limit - only send if this result is better than the
+            # worst result we already sent (heap root), checked in O(1)
+            should_send = bool(self._sent_scores) and self._sent_scores[0] < result["ranking"]["score"]
         
-        logger.debug(f"Should send result {result['name']}? {should_send} (sent: {self.num_results_sent}/{self.NUM_RESULTS_TO_SEND})")
+        logger.debug("Should send result %s? %s (sent: %d/%d)", result['name'], should_send, self.num_results_sent, self.NUM_RESULTS_TO_SEND)
         return should_send
     
     async def sendAnswers(self, answers, force=False):
-        if not self.handler.connection_alive_event.is_set():
-            logger.warning("Connection lost during ranking, skipping sending results")
-            return
-        
-        if (self.ranking_type == Ranking.FAST_TRACK and self.handler.state.should_abort_fast_track()):
-            logger.info("Fast track aborted, not sending answers")
+        if not self._should_continue():
+            logger.info("Connection lost or fast track aborted, not sending answers")
             return
               
-        json_results = []
-        logger.debug(f"Considering sending {len(answers)} answers (force: {force})")
-        
+        logger.debug("Considering sending %d answers (force: %s)", len(answers), force)
+
+        selected = []
         for result in answers:
             # Additional safety check - never exceed the limit even when forced
-            if self.num_results_sent + len(json_results) >= self.NUM_RESULTS_TO_SEND:
-                logger.info(f"Stopping at {len(json_results)} results to avoid exceeding limit of {self.NUM_RESULTS_TO_SEND}")
+            if self.num_results_sent + len(selected) >= self.NUM_RESULTS_TO_SEND:
+                logger.info("Stopping at %d results to avoid exceeding limit of %d", len(selected), self.NUM_RESULTS_TO_SEND)
                 break
-                
+
             if self.shouldSend(result) or force:
-                json_results.append({
-                    "url": result["url"],
-                    "name": result["name"],
-                    "site": result["site"],
-                    "siteUrl": result["site"],
-                    "score": result["ranking"]["score"],
-                    "description": result["ranking"]["description"],
-                    "schema_object": result["schema_object"],
-                    "ranking_type": self.ranking_type_str
-                })
-                
+                selected.append(result)
                 result["sent"] = True
+                heapq.heappush(self._sent_scores, result["ranking"]["score"])
+
+        # Build the payload dicts in one comprehension pass
+        json_results = [{
+            "url": result["url"],
+            "name": result["name"],
+            "site": result["site"],
+            "siteUrl": result["site"],
+            "score": result["ranking"]["score"],
+            "description": result["ranking"].get("description", ""),
+            "schema_object": result["schema_object"],
+            "ranking_type": self.ranking_type_str
+        } for result in selected]
             
         if (json_results):  # Only attempt to send if there are results
             # Wait for pre checks to be done using event
             await self.handler.pre_checks_done_event.wait()
             
-            # if we got here, prechecks are done. check once again for fast track abort
-            if (self.ranking_type == Ranking.FAST_TRACK and self.handler.state.should_abort_fast_track()):
-                logger.info("Fast track aborted after pre-checks")
+            # if we got here, prechecks are done. check once again before sending
+            if not self._should_continue():
+                logger.info("Connection lost or fast track aborted after pre-checks")
                 return
             
             try:
@@ -192,7 +400,7 @@ The user's question is: {request.query}. The item's description is {item.descrip
                     # Trim the results to not exceed the limit
                     allowed_count = self.NUM_RESULTS_TO_SEND - self.num_results_sent
                     json_results = json_results[:allowed_count]
-                    logger.warning(f"Trimmed results to {len(json_results)} to stay within limit of {self.NUM_RESULTS_TO_SEND}")
+                    logger.warning("Trimmed results to %d to stay within limit of %d", len(json_results), self.NUM_RESULTS_TO_SEND)
                 
                 if (self.ranking_type == Ranking.FAST_TRACK):
                     self.handler.fastTrackWorked = True
@@ -201,27 +409,28 @@ The user's question is: {request.query}. The item's description is {item.descrip
                 to_send = {"message_type": "result_batch", "results": json_results, "query_id": self.handler.query_id}
                 await self.handler.send_message(to_send)
                 self.num_results_sent += len(json_results)
-                logger.info(f"Sent {len(json_results)} results, total sent: {self.num_results_sent}/{self.NUM_RESULTS_TO_SEND}")
+                logger.info("Sent %d results, total sent: %d/%d", len(json_results), self.num_results_sent, self.NUM_RESULTS_TO_SEND)
             except (BrokenPipeError, ConnectionResetError) as e:
-                logger.error(f"Client disconnected while sending answers: {str(e)}")
+                logger.error("Client disconnected while sending answers: %s", e)
                 log(f"Client disconnected while sending answers: {str(e)}")
                 self.handler.connection_alive_event.clear()
             except Exception as e:
-                logger.error(f"Error sending answers: {str(e)}")
+                logger.error("Error sending answers: %s", e)
                 log(f"Error sending answers: {str(e)}")
                 self.handler.connection_alive_event.clear()
   
     async def sendMessageOnSitesBeingAsked(self, top_embeddings):
         if (self.handler.site == "all" or self.handler.site == "nlws"):
-            sites_in_embeddings = {}
-            for url, json_str, name, site in top_embeddings:
-                sites_in_embeddings[site] = sites_in_embeddings.get(site, 0) + 1
-            
-            top_sites = sorted(sites_in_embeddings.items(), key=lambda x: x[1], reverse=True)[:3]
+            if getattr(self.handler, "sites_in_embeddings_sent", False):
+                logger.debug("Sites message already sent, skipping")
+                return
+            # Counter's tally and most_common both run in C
+            site_counts = collections.Counter(site for url, json_str, name, site in top_embeddings)
+            top_sites = site_counts.most_common(3)
             top_sites_str = ", ".join([self.prettyPrintSite(x[0]) for x in top_sites])
             message = {"message_type": "asking_sites",  "message": "Asking " + top_sites_str}
             
-            logger.info(f"Sending sites message: {top_sites_str}")
+            logger.info("Sending sites message: %s", top_sites_str)
             
             try:
                 await self.handler.send_message(message)
@@ -231,71 +440,106 @@ The user's question is: {request.query}. The item's description is {item.descrip
                 self.handler.connection_alive_event.clear()
     
     async def do(self):
-        logger.info(f"Starting ranking process with {len(self.items)} items")
-        tasks = []
-        for url, json_str, name, site in self.items:
-            if self.handler.connection_alive_event.is_set():  # Only add new tasks if connection is still alive
-                tasks.append(asyncio.create_task(self.rankItem(url, json_str, name, site)))
-            else:
-                logger.warning("Connection lost, not creating new ranking tasks")
+        logger.info("Starting ranking process with %d items", len(self.items))
+        self.metrics.start_timer()
+        try:
+            self._expire_cache()
+            # Group items with identical content so each distinct payload
+            # costs one LLM call; duplicates are fanned back out per item.
+            groups = {}
+            for item in self.items:
+                groups.setdefault(self._content_fingerprint(item[1]), []).append(item)
+        
+            tasks = []
+            for group in groups.values():
+                if self.handler.connection_alive_event.is_set():  # Only add new tasks if connection is still alive
+                    url, json_str, name, site = group[0]
+                    tasks.append(asyncio.create_task(
+                        self.rankItem(url, json_str, name, site, duplicates=group[1:])))
+                else:
+                    logger.warning("Connection lost, not creating new ranking tasks")
        
-        await self.sendMessageOnSitesBeingAsked(self.items)
+            await self.sendMessageOnSitesBeingAsked(self.items)
 
-        try:
-            logger.debug(f"Running {len(tasks)} ranking tasks concurrently")
-            await asyncio.gather(*tasks, return_exceptions=True)
-        except Exception as e:
-            logger.error(f"Error during ranking tasks: {str(e)}")
-            log(f"Error during ranking tasks: {str(e)}")
+            logger.debug("Running %d ranking tasks concurrently", len(tasks))
+            # Consume tasks as they finish rather than blocking on the
+            # slowest one, re-checking the connection between wakeups so
+            # a disconnect cancels the remaining LLM calls instead of
+            # paying for answers nobody will receive. The timeout bounds
+            # how long a dead connection can keep tasks running, since
+            # connection_alive_event offers no awaitable "cleared" signal.
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=0.25, return_when=asyncio.FIRST_COMPLETED)
+                for completed in done:
+                    try:
+                        await completed
+                    except Exception as e:
+                        logger.error("Error during ranking task: %s", e)
+                        log(f"Error during ranking task: {str(e)}")
+                if pending and not self.handler.connection_alive_event.is_set():
+                    logger.warning("Connection lost, cancelling %d pending ranking tasks", len(pending))
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    break
 
-        if not self.handler.connection_alive_event.is_set():
-            logger.warning("Connection lost during ranking, skipping sending results")
-            log("Connection lost during ranking, skipping sending results")
-            return
+            if not self.handler.connection_alive_event.is_set():
+                logger.warning("Connection lost during ranking, skipping sending results")
+                log("Connection lost during ranking, skipping sending results")
+                return
 
-        # Wait for pre checks using event
-        await self.handler.pre_checks_done_event.wait()
+            # Wait for pre checks using event
+            await self.handler.pre_checks_done_event.wait()
         
-        if (self.ranking_type == Ranking.FAST_TRACK and self.handler.state.should_abort_fast_track()):
-            logger.info("Fast track aborted after ranking tasks completed")
-            return
+            if not self._should_continue():
+                logger.info("Connection lost or fast track aborted after ranking tasks completed")
+                return
     
-        filtered = [r for r in self.rankedAnswers if r['ranking']['score'] > 51]
-        ranked = sorted(filtered, key=lambda x: x['ranking']["score"], reverse=True)
-        self.handler.final_ranked_answers = ranked[:self.NUM_RESULTS_TO_SEND]
-        
-        logger.info(f"Filtered to {len(filtered)} results with score > 51")
-        logger.debug(f"Top 3 results: {[(r['name'], r['ranking']['score']) for r in ranked[:3]]}")
+            # Top-K selection: nlargest over a filtering generator is
+            # O(N log K) and skips building the intermediate filtered list,
+            # vs O(N log N) for a full sort + slice.
+            ranked = heapq.nlargest(self.NUM_RESULTS_TO_SEND,
+                                    (r for r in self.rankedAnswers if r['ranking']['score'] > 51),
+                                    key=lambda x: x['ranking']["score"])
+            self.handler.final_ranked_answers = ranked
 
-        results = [r for r in self.rankedAnswers if r['sent'] == False]
-        if (self.num_results_sent > self.NUM_RESULTS_TO_SEND):
-            logger.info(f"Already sent {self.num_results_sent} results, returning without sending more")
-            return
-       
-        # Sort by score in descending order
-        sorted_results = sorted(results, key=lambda x: x['ranking']["score"], reverse=True)
-        good_results = [x for x in sorted_results if x['ranking']["score"] > 51]
-
-        # Calculate how many more results we can send
-        remaining_slots = self.NUM_RESULTS_TO_SEND - self.num_results_sent
-        if remaining_slots <= 0:
-            logger.info(f"Already sent {self.num_results_sent} results, at or above limit of {self.NUM_RESULTS_TO_SEND}")
-            return
-            
-        if len(good_results) >= remaining_slots:
-            tosend = good_results[:remaining_slots]
-        else:
-            tosend = good_results
+            logger.info("Selected top %d results with score > 51", len(ranked))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Top 3 results: %s", [(r['name'], r['ranking']['score']) for r in ranked[:3]])
 
-        try:
-            logger.info(f"Sending final batch of {len(tosend)} results")
-            await self.sendAnswers(tosend, force=True)
-        except (BrokenPipeError, ConnectionResetError):
-            logger.error("Client disconnected during final answer sending")
-            log("Client disconnected during final answer sending")
-            self.handler.connection_alive_event.clear()
-
-    def prettyPrintSite(self, site):
+            results = [r for r in self.rankedAnswers if r['sent'] == False]
+            if (self.num_results_sent > self.NUM_RESULTS_TO_SEND):
+                logger.info("Already sent %d results, returning without sending more", self.num_results_sent)
+                return
+
+            # Calculate how many more results we can send
+            remaining_slots = self.NUM_RESULTS_TO_SEND - self.num_results_sent
+            if remaining_slots <= 0:
+                logger.info("Already sent %d results, at or above limit of %d", self.num_results_sent, self.NUM_RESULTS_TO_SEND)
+                return
+
+            tosend = heapq.nlargest(remaining_slots,
+                                    (x for x in results if x['ranking']["score"] > 51),
+                                    key=lambda x: x['ranking']["score"])
+
+            try:
+                logger.info("Sending final batch of %d results", len(tosend))
+                await self.sendAnswers(tosend, force=True)
+            except (BrokenPipeError, ConnectionResetError):
+                logger.error("Client disconnected during final answer sending")
+                log("Client disconnected during final answer sending")
+                self.handler.connection_alive_event.clear()
+        finally:
+            self.metrics.stop_timer()
+            self.metrics.log_summary()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def prettyPrintSite(site):
+        # The set of site names is small and stable, so cache the
+        # formatted strings across calls and instances.
         ans = site.replace("_", " ")
         words = ans.split()
         return ' '.join(word.capitalize() for word in words)
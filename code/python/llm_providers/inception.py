@@ -35,6 +35,8 @@ class InceptionProvider(LLMProvider):
     
     API_URL = "https://api.inceptionlabs.ai/v1/chat/completions"  # Mercury chat endpoint
 
+    _session = None
+
     @classmethod
     def get_api_key(cls) -> str:
         """Get API key from environment variables."""
@@ -46,10 +48,13 @@ class InceptionProvider(LLMProvider):
     @classmethod
     def get_client(cls):
         """
-        Inception uses direct HTTP calls, so there's no persistent client.
-        This method is implemented to satisfy the interface but returns None.
+        Return a shared aiohttp session, created lazily so it binds to
+        the running event loop. Reusing the session keeps connections
+        alive instead of paying a TCP+TLS handshake per completion.
         """
-        return None
+        if cls._session is None or cls._session.closed:
+            cls._session = aiohttp.ClientSession()
+        return cls._session
 
     @classmethod
     def clean_response(cls, content: str) -> Dict[str, Any]:
@@ -115,21 +120,21 @@ class InceptionProvider(LLMProvider):
             payload["diffusing"] = True
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.API_URL, 
-                    headers=HEADERS, 
-                    json=payload, 
-                    timeout=timeout
-                ) as resp:
-                    resp.raise_for_status()
-                    data = await resp.json()
-                    content = data["choices"][0]["message"]["content"]
-                    
-                    # If schema was provided, parse the response as JSON
-                    if schema:
-                        return self.clean_response(content)
-                    return content
+            session = self.get_client()
+            async with session.post(
+                self.API_URL,
+                headers=HEADERS,
+                json=payload,
+                timeout=timeout
+            ) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
+                content = data["choices"][0]["message"]["content"]
+
+                # If schema was provided, parse the response as JSON
+                if schema:
+                    return self.clean_response(content)
+                return content
         except Exception as e:
             # Log the error and return empty response
             import logging
@@ -29,10 +29,21 @@ logger = logging.getLogger(__name__)
 class SnowflakeProvider(LLMProvider):
     """Implementation of LLMProvider for Snowflake LLM REST API calls."""
 
+    _client = None
+
     @classmethod
     def get_client(cls):
-        """No-op since no persistent client is needed."""
-        return None
+        """
+        Configure and return a shared asynchronous HTTP client.
+
+        Reusing one client keeps connections alive across requests, so
+        concurrent completions don't each pay a TCP+TLS handshake.
+        """
+        if cls._client is None:
+            cls._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=128, max_keepalive_connections=32)
+            )
+        return cls._client
 
     @classmethod
     def clean_response(cls, content: str) -> Dict[str, Any]:
@@ -124,24 +135,24 @@ async def cortex_complete(
 
 async def post(api: str, request: dict, timeout: float) -> dict:
     cfg = CONFIG.llm_endpoints.get("snowflake")
-    async with httpx.AsyncClient() as client:
-        response =  await client.post(
-            snowflake.get_account_url(cfg) + api,
-            json=request,
-            headers={
-                    "Authorization": f"Bearer {snowflake.get_pat(cfg)}",
-                    "Content-Type": "application/json",
-                    "Accept": "application/json",
-            },
-            timeout=timeout,
-        )
-        if response.status_code == 400:
-            logger.error(f"Snowflake API error: {response.json()}")
-            return {}
-        try:
-            response.raise_for_status()
-        except Exception as e:
-            logger.error(f"Snowflake API request failed: {e}")
-            return {}
-        return response.json()
+    client = SnowflakeProvider.get_client()
+    response = await client.post(
+        snowflake.get_account_url(cfg) + api,
+        json=request,
+        headers={
+                "Authorization": f"Bearer {snowflake.get_pat(cfg)}",
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+        },
+        timeout=timeout,
+    )
+    if response.status_code == 400:
+        logger.error(f"Snowflake API error: {response.json()}")
+        return {}
+    try:
+        response.raise_for_status()
+    except Exception as e:
+        logger.error(f"Snowflake API request failed: {e}")
+        return {}
+    return response.json()
 
@@ -402,6 +402,10 @@ class LazyLogger:
         """Log a message with additional context information asynchronously."""
         self.async_processor.enqueue_log(self.module_name, 'log_with_context', message, level, context)
     
+    def isEnabledFor(self, level) -> bool:
+        """Check if a message at level would be emitted - requires sync access to real logger."""
+        return self._ensure_logger_for_sync_ops().logger.isEnabledFor(level)
+
     def set_level(self, level):
         """Set the logging verbosity level - requires sync access to real logger."""
         self._ensure_logger_for_sync_ops().set_level(level)